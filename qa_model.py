@@ -1,10 +1,17 @@
 import os
-import joblib
+import time
 import random
+import multiprocessing
+import torch
 from sentence_transformers import SentenceTransformer, util
+from utils.embed_workers import MODEL_NAME, init_worker, encode_shard
+from utils import index_store
+from utils.index_store import collect_rows
 
 # === Cache and Model Paths ===
-CACHE_DIR = "/app/cache"
+# Honour an existing HF_HOME (the Dockerfile sets /app/cache) so importing
+# this module doesn't need /app to be writable
+CACHE_DIR = os.environ.get("HF_HOME", "/app/cache")
 os.makedirs(CACHE_DIR, exist_ok=True)
 
 os.environ["HF_HOME"] = CACHE_DIR
@@ -14,7 +21,7 @@ os.environ["TORCH_HOME"] = CACHE_DIR
 model_path = "qa_model_embeddings.pkl"
 
 # === Load SentenceTransformer ===
-model = SentenceTransformer("all-MiniLM-L6-v2")
+model = SentenceTransformer(MODEL_NAME)
 
 # === Global: Model Memory
 embeddings = []
@@ -29,53 +36,118 @@ last_answer = None
 def embed(text):
     return model.encode(text, convert_to_tensor=True)
 
-# === Train and Save the Model ===
-def train_qa_model(collection):
+# === Persist an (embeddings, questions, answers, snapshot) index
+def save_model(index):
     global embeddings, questions, answers
+    try:
+        saved = index_store.save_index(model_path, index)
+    except Exception as e:
+        print("❌ Failed to save model:", e)
+        return f"❌ Model save failed: {e}"
 
+    if not saved:
+        # Someone saved from a later read of the collection; never go backwards
+        print("⚠️ A newer Q&A model is already saved; loading it instead.")
+        load_model()
+        return "❌ Model not saved: a newer one is already on disk."
+
+    embeddings, questions, answers, _ = index
+    print("✅ Semantic Q&A model trained and saved.")
+    return "✅ Semantic Q&A model trained and reloaded."
+
+# === Train and Save the Model ===
+def train_qa_model(collection):
     print("⚙️ Training Q&A model...")
+    snapshot = time.time()
     data = list(collection.find())
 
     if not data:
         print("⚠️ No Q&A data available to train.")
         return "❌ Training failed: No data found."
 
-    embeddings = []
-    questions = []
-    answers = []
-
-    for item in data:
-        q = item["question"].strip().lower()
-        ans_list = item["answer"]
-
-        if isinstance(ans_list, str):
-            ans_list = [ans_list]
+    rows_q, rows_a = collect_rows(data)
+    rows_emb = [embed(q) for q in rows_q]
+
+    return save_model((rows_emb, rows_q, rows_a, snapshot))
+
+# === Workers actually worth starting for this many rows
+def plan_workers(row_count, workers=None, shard_size=256):
+    shard_count = -(-row_count // shard_size)
+    return max(1, min(workers or os.cpu_count() or 1, shard_count))
+
+# === Start a pool of CPU encoder processes
+def open_encoder_pool(workers, wait_ready=False):
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    # Spawn, not fork: torch thread pools don't survive fork safely
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Queue() if wait_ready else None
+    pool = ctx.Pool(workers, initializer=init_worker, initargs=(MODEL_NAME, threads, ready))
+    if ready is not None:
+        # Each worker reports once its encoder is loaded and warmed up
+        for _ in range(workers):
+            ready.get()
+    return pool
+
+# === Encode shards on an open pool, keeping input order
+def encode_with_pool(pool, texts, shard_size=256):
+    shards = [(i, texts[i:i + shard_size]) for i in range(0, len(texts), shard_size)]
+    results = []
+    for start, vectors in pool.imap(encode_shard, shards):
+        if start != len(results):
+            raise RuntimeError(f"Shard at row {start} arrived out of order (expected {len(results)})")
+        # Copy each row so every embedding pickles with its own storage
+        results.extend(torch.from_numpy(v.copy()).to(model.device) for v in vectors)
+    return results
+
+# === Encode questions across a process pool, keeping input order
+def encode_parallel(texts, workers=None, shard_size=256):
+    if not texts:
+        return []
+
+    workers = plan_workers(len(texts), workers, shard_size)
+    if workers == 1:
+        return [e.clone() for e in model.encode(texts, convert_to_tensor=True)]
+
+    with open_encoder_pool(workers) as pool:
+        return encode_with_pool(pool, texts, shard_size)
+
+# === Parallel rebuild for large collections (run outside the web process)
+def train_qa_model_parallel(collection, workers=None, shard_size=256):
+    print("⚙️ Rebuilding Q&A model...")
+    snapshot = time.time()
+    data = list(collection.find())
 
-        for ans in ans_list:
-            a = ans.strip()
-            if a:
-                questions.append(q)
-                answers.append(a)
-                embeddings.append(embed(q))
+    if not data:
+        print("⚠️ No Q&A data available to train.")
+        return "❌ Training failed: No data found."
 
+    rows_q, rows_a = collect_rows(data)
+    workers = plan_workers(len(rows_q), workers, shard_size)
+    where = "in-process" if workers == 1 else f"with {workers} workers"
+    print(f"🧩 Encoding {len(rows_q)} rows {where}...")
     try:
-        joblib.dump((embeddings, questions, answers), model_path)
-        print("✅ Semantic Q&A model trained and saved.")
-        return "✅ Semantic Q&A model trained and reloaded."
+        rows_emb = encode_parallel(rows_q, workers=workers, shard_size=shard_size)
     except Exception as e:
-        print("❌ Failed to save model:", e)
-        return f"❌ Model save failed: {e}"
+        print("❌ Parallel encoding failed:", e)
+        return f"❌ Rebuild failed: {e}"
+
+    return save_model((rows_emb, rows_q, rows_a, snapshot))
 
 # === Load Model into Memory
-def load_model():
+def load_model(only_newer=False):
     global embeddings, questions, answers
     try:
-        embeddings, questions, answers = joblib.load(model_path)
-        return True
+        index = index_store.load_index(model_path, only_newer=only_newer)
     except Exception as e:
         print("❌ Failed to load Q&A model:", e)
         return False
 
+    if index is None:
+        print("⚠️ Ignoring an older Q&A model on disk.")
+    else:
+        embeddings, questions, answers, _ = index
+    return True
+
 # === Shorten long answers
 def shorten_text(text, max_sentences=2):
     try:
@@ -98,6 +170,10 @@ def load_and_predict_answer(
     global last_query, last_answer, embeddings, questions, answers
 
     try:
+        # Pick up an index rebuilt by another process (e.g. qa_rebuild)
+        if index_store.changed_on_disk(model_path):
+            load_model(only_newer=True)
+
         if not embeddings or not questions or not answers:
             if not load_model():
                 if collection:
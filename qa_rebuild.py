@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+
+# qa_model is imported inside the commands, not at module level: spawned
+# pool workers re-import this module and shouldn't each load a second encoder.
+
+# === Rebuild the Q&A index from MongoDB
+def rebuild(args):
+    from pymongo import MongoClient
+    from qa_model import train_qa_model_parallel
+
+    load_dotenv()
+    client = MongoClient(os.getenv("MONGO_URI"))
+    qa_collection = client["VoiceAssistant"]["qa_data"]
+
+    start = time.perf_counter()
+    message = train_qa_model_parallel(qa_collection, workers=args.workers, shard_size=args.shard_size)
+    print(message)
+    print(f"⏱️ Rebuild took {time.perf_counter() - start:.1f}s")
+
+    # Let cron / shell scripts see a failed rebuild
+    if not message.startswith("✅"):
+        sys.exit(1)
+
+# === Scaling benchmark on synthetic questions (no DB needed)
+def bench(args):
+    from qa_model import open_encoder_pool, encode_with_pool
+
+    texts = [f"what is the meaning of sample question number {i}" for i in range(args.rows)]
+
+    # Every count, 1 included, goes through the same pool path. Pool start-up
+    # and encoder loading are timed apart from the encode itself.
+    print(f"📊 Encoding {args.rows} rows, shard size {args.shard_size}")
+    print(f"{'workers':>8} {'load s':>8} {'encode s':>9} {'rows/sec':>10} {f'vs {args.workers[0]}w':>8}")
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        # Returns only once every worker has loaded and warmed its encoder
+        with open_encoder_pool(workers, wait_ready=True) as pool:
+            loaded = time.perf_counter()
+            encode_with_pool(pool, texts, args.shard_size)
+            done = time.perf_counter()
+
+        rate = args.rows / (done - loaded)
+        baseline = baseline or rate
+        print(f"{workers:>8} {loaded - start:>8.2f} {done - loaded:>9.2f} {rate:>10.1f} {rate / baseline:>7.2f}x")
+
+# === argparse type: integer >= 1
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1, got {value}")
+    return number
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Q&A index tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_rebuild = sub.add_parser("rebuild", help="Re-encode every Q&A row and save the index")
+    p_rebuild.add_argument("--workers", type=positive_int, default=os.cpu_count(), help="Encoder processes (default: all cores)")
+    p_rebuild.add_argument("--shard-size", type=positive_int, default=256, help="Questions per worker task")
+    p_rebuild.set_defaults(func=rebuild)
+
+    p_bench = sub.add_parser("bench", help="Measure rows/sec as the worker count grows")
+    p_bench.add_argument("--workers", type=positive_int, nargs="+", default=[1, 2, 4], help="Worker counts to try (speedup is relative to the first)")
+    p_bench.add_argument("--rows", type=positive_int, default=5000, help="Synthetic questions to encode")
+    p_bench.add_argument("--shard-size", type=positive_int, default=256, help="Questions per worker task")
+    p_bench.set_defaults(func=bench)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Repo root for `import qa_model`, this dir for the stub encoder that
+# spawned pool workers import by name.
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+sys.path.insert(0, TESTS_DIR)
+
+# qa_model creates its HF cache dir at import; keep it off /app
+os.environ.setdefault("HF_HOME", tempfile.mkdtemp(prefix="qa-hf-"))
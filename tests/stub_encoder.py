@@ -0,0 +1,17 @@
+import numpy as np
+
+# === Cheap deterministic stand-in for the sentence encoder
+def vectorize(texts):
+    return np.array(
+        [[len(t), sum(map(ord, t)), t.count(" "), ord(t[0]) if t else 0] for t in texts],
+        dtype=np.float32,
+    )
+
+# === Pool worker stand-ins (must live in an importable module for spawn)
+def init_worker(model_name=None, num_threads=1, ready=None):
+    if ready is not None:
+        ready.put(None)
+
+def encode_shard(shard):
+    start, texts = shard
+    return start, vectorize(texts)
@@ -0,0 +1,99 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("joblib")
+
+from utils import index_store
+
+
+@pytest.fixture
+def path(monkeypatch, tmp_path):
+    monkeypatch.setattr(index_store, "seen_mtime", None)
+    monkeypatch.setattr(index_store, "seen_snapshot", None)
+    monkeypatch.setattr(index_store, "loaded_snapshot", None)
+    return str(tmp_path / "index.pkl")
+
+
+def index(snapshot, *answers):
+    answers = list(answers)
+    return [[i] * 3 for i in range(len(answers))], ["q"] * len(answers), answers, snapshot
+
+
+def forget_local_state():
+    # Look at the file the way a different process would
+    index_store.seen_mtime = None
+    index_store.seen_snapshot = None
+    index_store.loaded_snapshot = None
+
+
+def test_collect_rows_flattens_and_skips_blank_answers():
+    docs = [
+        {"question": " What IS it? ", "answer": ["one", " ", " two "]},
+        {"question": "single", "answer": "only"},
+        {"question": "blank", "answer": ""},
+    ]
+
+    assert index_store.collect_rows(docs) == (
+        ["what is it?", "what is it?", "single"],
+        ["one", "two", "only"],
+    )
+    assert index_store.collect_rows([{"question": "q", "answer": [" ", ""]}]) == ([], [])
+
+
+def test_save_load_round_trip(path):
+    saved = index(10.0, "a", "b")
+    assert index_store.save_index(path, saved)
+    assert not [f for f in os.listdir(os.path.dirname(path)) if f.endswith(".tmp")]
+    assert oct(os.stat(path).st_mode & 0o777) == oct(0o644)
+
+    forget_local_state()
+    assert tuple(index_store.load_index(path)) == tuple(saved)
+
+
+def test_legacy_three_tuple_index_loads_as_oldest(path):
+    import joblib
+
+    joblib.dump(([[0]], ["q"], ["a"]), path)
+
+    assert index_store.load_index(path)[3] == 0.0
+    assert index_store.save_index(path, index(1.0, "newer"))
+
+
+def test_save_refuses_to_replace_newer_index(path):
+    assert index_store.save_index(path, index(20.0, "fresh"))
+
+    # Same process, and a process that never touched the file
+    assert not index_store.save_index(path, index(10.0, "stale"))
+    forget_local_state()
+    assert not index_store.save_index(path, index(10.0, "stale"))
+
+    assert index_store.load_index(path)[2] == ["fresh"]
+    assert index_store.save_index(path, index(30.0, "fresher"))
+
+
+def test_changed_on_disk_tracks_other_writers(path):
+    assert not index_store.changed_on_disk(path)
+
+    index_store.save_index(path, index(10.0, "a"))
+    assert not index_store.changed_on_disk(path)
+
+    index_store.seen_mtime = None
+    assert index_store.changed_on_disk(path)
+    index_store.load_index(path)
+    assert not index_store.changed_on_disk(path)
+
+
+def test_load_only_newer_skips_older_index(path):
+    index_store.save_index(path, index(10.0, "old"))
+    index_store.loaded_snapshot = 20.0
+
+    assert index_store.load_index(path, only_newer=True) is None
+    assert index_store.loaded_snapshot == 20.0
+    assert index_store.disk_snapshot(path) == 10.0
+    assert not index_store.changed_on_disk(path)
+
+    index_store.save_index(path, index(time.time(), "new"))
+    index_store.seen_mtime = None
+    assert index_store.load_index(path, only_newer=True)[2] == ["new"]
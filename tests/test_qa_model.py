@@ -0,0 +1,129 @@
+import os
+import time
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("numpy")
+pytest.importorskip("joblib")
+sentence_transformers = pytest.importorskip("sentence_transformers")
+
+import stub_encoder
+from utils import index_store
+
+
+class StubModel:
+    device = torch.device("cpu")
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def encode(self, texts, convert_to_tensor=False, **kwargs):
+        if isinstance(texts, str):
+            return torch.from_numpy(stub_encoder.vectorize([texts])[0].copy())
+        return torch.from_numpy(stub_encoder.vectorize(texts))
+
+
+# qa_model loads its encoder at import time; swap in the stub first
+sentence_transformers.SentenceTransformer = StubModel
+import qa_model
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self):
+        return list(self.docs)
+
+
+DOCS = [
+    {"question": f" Question {i} ", "answer": [f"answer {i}a", " ", f"answer {i}b"]}
+    for i in range(8)
+] + [{"question": "single", "answer": "just one"}]
+
+
+@pytest.fixture
+def qa(monkeypatch, tmp_path):
+    monkeypatch.setattr(qa_model, "model", StubModel())
+    monkeypatch.setattr(qa_model, "model_path", str(tmp_path / "index.pkl"))
+    monkeypatch.setattr(qa_model, "init_worker", stub_encoder.init_worker)
+    monkeypatch.setattr(qa_model, "encode_shard", stub_encoder.encode_shard)
+    monkeypatch.setattr(qa_model, "embeddings", [])
+    monkeypatch.setattr(qa_model, "questions", [])
+    monkeypatch.setattr(qa_model, "answers", [])
+    monkeypatch.setattr(index_store, "seen_mtime", None)
+    monkeypatch.setattr(index_store, "seen_snapshot", None)
+    monkeypatch.setattr(index_store, "loaded_snapshot", None)
+    return qa_model
+
+
+def snapshot(qa):
+    return list(qa.embeddings), list(qa.questions), list(qa.answers), os.path.getsize(qa.model_path)
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+def test_parallel_matches_serial(qa, workers):
+    collection = FakeCollection(DOCS)
+
+    qa.train_qa_model(collection)
+    serial_emb, serial_q, serial_a, serial_size = snapshot(qa)
+
+    qa.train_qa_model_parallel(collection, workers=workers, shard_size=3)
+    emb, q, a, size = snapshot(qa)
+
+    assert len(serial_q) == 17
+    assert q == serial_q
+    assert a == serial_a
+    assert all(torch.equal(x, y) for x, y in zip(emb, serial_emb))
+    assert all(e.device == qa.model.device for e in emb)
+    # Rows must not drag a shared shard/matrix storage into the pickle
+    assert size == serial_size
+
+
+def test_blank_answers_give_empty_index(qa, monkeypatch):
+    collection = FakeCollection([{"question": "q", "answer": [" ", ""]}, {"question": "r", "answer": ""}])
+
+    def no_pool(workers, wait_ready=False):
+        raise AssertionError("pool should not start for an empty index")
+
+    monkeypatch.setattr(qa, "open_encoder_pool", no_pool)
+
+    assert qa.collect_rows(collection.find()) == ([], [])
+    assert qa.encode_parallel([], workers=4) == []
+    assert qa.train_qa_model_parallel(collection, workers=4).startswith("✅")
+    assert (qa.embeddings, qa.questions, qa.answers) == ([], [], [])
+
+
+def test_save_load_round_trip(qa):
+    qa.train_qa_model_parallel(FakeCollection(DOCS), workers=2, shard_size=4)
+    emb, q, a, _ = snapshot(qa)
+    assert not [f for f in os.listdir(os.path.dirname(qa.model_path)) if f.endswith(".tmp")]
+
+    qa.embeddings, qa.questions, qa.answers = [], [], []
+    assert qa.load_model()
+
+    assert qa.questions == q
+    assert qa.answers == a
+    assert all(torch.equal(x, y) for x, y in zip(qa.embeddings, emb))
+
+
+def test_predict_reloads_index_written_elsewhere(qa):
+    qa.train_qa_model(FakeCollection([{"question": "old", "answer": ["stale"]}]))
+
+    # Another process saves an index from a later read of the collection
+    index_store.save_index(qa.model_path, ([qa.embed("new")], ["new"], ["fresh"], time.time() + 1))
+    index_store.seen_mtime = None
+
+    assert qa.load_and_predict_answer("new", similarity_threshold=0.99) == "fresh"
+
+
+def test_rebuild_from_older_read_is_not_saved(qa):
+    collection = FakeCollection(DOCS)
+    qa.train_qa_model(collection)
+
+    # The web app retrains after the rebuild has read the collection
+    index_store.save_index(qa.model_path, ([qa.embed("new")], ["new"], ["fresh"], time.time() + 60))
+
+    assert qa.train_qa_model_parallel(collection, workers=2, shard_size=4).startswith("❌")
+    assert qa.answers == ["fresh"]
@@ -0,0 +1,27 @@
+import os
+import torch
+from sentence_transformers import SentenceTransformer
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# === Per-process encoder, created once by the pool initializer
+_worker_model = None
+
+def init_worker(model_name=MODEL_NAME, num_threads=1, ready=None):
+    """Load a private encoder in this worker process, then report on `ready`"""
+    global _worker_model
+    # Cap torch threads so N workers don't oversubscribe the box
+    torch.set_num_threads(num_threads)
+    # Workers are for spare CPU cores; keep them off any shared GPU
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+
+    if ready is not None:
+        # First forward pass is slow; get it out of the way before reporting
+        _worker_model.encode(["warm up"], convert_to_numpy=True)
+        ready.put(os.getpid())
+
+def encode_shard(shard):
+    """Encode one (start, texts) shard and hand back (start, vectors)"""
+    start, texts = shard
+    vectors = _worker_model.encode(texts, convert_to_numpy=True)
+    return start, vectors
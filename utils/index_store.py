@@ -0,0 +1,117 @@
+import os
+import fcntl
+import tempfile
+from contextlib import contextmanager
+import joblib
+
+# The index file holds (embeddings, questions, answers, snapshot), where
+# snapshot is the time.time() at which the Q&A collection was read. The app
+# only ever adds answers, so a later snapshot always covers an earlier one.
+
+# === Index file as this process last saw it (mtime and its snapshot)
+seen_mtime = None
+seen_snapshot = None
+
+# === Snapshot of the index this process holds in memory
+loaded_snapshot = None
+
+# === Flatten Q&A documents into (question, answer) rows
+def collect_rows(data):
+    rows_q = []
+    rows_a = []
+
+    for item in data:
+        q = item["question"].strip().lower()
+        ans_list = item["answer"]
+
+        if isinstance(ans_list, str):
+            ans_list = [ans_list]
+
+        for ans in ans_list:
+            a = ans.strip()
+            if a:
+                rows_q.append(q)
+                rows_a.append(a)
+
+    return rows_q, rows_a
+
+# === mtime of the index file on disk (None if missing)
+def disk_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+# === True when another process has replaced the index since we last touched it
+def changed_on_disk(path):
+    return disk_mtime(path) not in (None, seen_mtime)
+
+# === Exclusive lock held around compare-and-swap of the index file
+@contextmanager
+def index_lock(path):
+    with open(path + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def read_index(path):
+    index = joblib.load(path)
+    if len(index) == 3:
+        # Index saved before snapshots were recorded: older than anything new
+        return (*index, 0.0)
+    return index
+
+# === Snapshot of the index on disk (None if missing or unreadable)
+def disk_snapshot(path):
+    mtime = disk_mtime(path)
+    if mtime is None:
+        return None
+    if mtime == seen_mtime:
+        return seen_snapshot
+    try:
+        return read_index(path)[3]
+    except Exception:
+        return None
+
+# === Atomically replace the index unless the one on disk is newer
+def save_index(path, index):
+    global seen_mtime, seen_snapshot, loaded_snapshot
+
+    with index_lock(path):
+        on_disk = disk_snapshot(path)
+        if on_disk is not None and on_disk > index[3]:
+            return False
+
+        # Write beside the target and swap in, so a reader never sees a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                joblib.dump(tuple(index), f)
+            os.chmod(tmp_path, 0o644)  # mkstemp defaults to 0600
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        seen_mtime = disk_mtime(path)
+        seen_snapshot = loaded_snapshot = index[3]
+    return True
+
+# === Read the index; with only_newer, None if it is older than what we hold
+def load_index(path, only_newer=False):
+    global seen_mtime, seen_snapshot, loaded_snapshot
+
+    # Record the attempt first so a bad file isn't re-read on every query
+    seen_mtime = disk_mtime(path)
+    seen_snapshot = None
+    index = read_index(path)
+    seen_snapshot = index[3]
+
+    if only_newer and loaded_snapshot is not None and index[3] < loaded_snapshot:
+        return None
+
+    loaded_snapshot = index[3]
+    return index